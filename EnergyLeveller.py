@@ -7,13 +7,38 @@ Energy Leveller version 2.0  (2019)
 This code is shared under the MIT license Copyright 2019 James Furness.
 You are free to use, modify and distribute the code, though recognition of my effort is appreciated!
 """
+import functools
+import json
 import os.path
+import re
 import sys
 
+try:
+    import tomllib
+except ImportError:  # python < 3.11
+    tomllib = None
+
 import matplotlib
-import matplotlib.pyplot as plt
 
+#   Select the backend before pyplot is imported, so Agg is used from the start
 matplotlib.use("Agg")
+matplotlib.rcParams.update(
+    {
+        "path.simplify": True,
+        "path.simplify_threshold": 1.0,
+        "agg.path.chunksize": 10000,
+    }
+)
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
 
 
 class Diagram:
@@ -21,7 +46,7 @@ class Diagram:
     Holds global values for the diagram and handles drawing through Draw() method.
     """
 
-    def __init__(self, width, height, fontSize, outputName, y_lims):
+    def __init__(self, width, height, fontSize, outputName, y_lims, dpi=None, fig=None):
         self.width = width
         self.height = height
         self.y_lims = y_lims
@@ -31,24 +56,54 @@ class Diagram:
             self.sorted_y_lims = None
         self.outputName = outputName
 
-        self.fig = plt.figure(figsize=(self.width, self.height))
-        self.ax = self.fig.add_subplot(111)
+        self.dpi = dpi  # None leaves matplotlib's default
+        #   Applied only while this diagram is built, so batches don't leak it into each other.
+        #   A font size of None leaves matplotlib's default.
+        self.rc = {} if fontSize is None else {"font.size": fontSize}
 
-        self.statesList = {}
+        #   Draw straight onto an Agg canvas, no pyplot figure manager is needed for a file.
+        #   A figure from an earlier diagram can be passed in to reuse it for batches of inputs.
+        if fig is None:
+            self.fig = Figure(figsize=(self.width, self.height), dpi=self.dpi)
+            FigureCanvasAgg(self.fig)
+        else:
+            self.fig = fig
+            self.fig.clear()
+            self.fig.set_size_inches(self.width, self.height)
+            self.fig.set_dpi(
+                self.dpi if self.dpi is not None else matplotlib.rcParams["figure.dpi"]
+            )
+        with matplotlib.rc_context(self.rc):
+            self.ax = self.fig.add_subplot(111)
+
+        self.states = []  # In input order, used for drawing
+        self.state_index = (
+            {}
+        )  # Name -> position in states, for links and the uniqueness check
+        #   Struct-of-arrays layout of the states, filled by MakeLeftRightPoints()
+        self.energies = np.zeros(0)
+        self.left_x = np.zeros(0)
+        self.right_x = np.zeros(0)
+        self.link_src = np.zeros(0, dtype=int)
+        self.link_dst = np.zeros(0, dtype=int)
+        self.link_colors = []
         self.dashes = [6.0, 3.0]  # ink, skip
         self.columns = 0
         self.energyUnits = ""
         self.do_legend = False
+        self.tight_layout = True
 
     def AddState(self, state):
         state.name = state.name.upper()
-        state.color = state.color
-        state.labelColor = state.labelColor
+        #   Parse the colours once here, instead of matplotlib re-parsing the strings when drawing
+        state.color = ParseColor(state.color, state.name)
+        state.labelColor = ParseColor(state.labelColor, state.name)
         state.linksTo = state.linksTo.upper()
         if state.legend is not None:
             self.do_legend = True
-        if state.name not in self.statesList:
-            self.statesList[state.name] = state
+        if state.name not in self.state_index:
+            self.state_index[state.name] = len(self.states)
+            self.states.append(state)
         else:
             print(
                 "ERROR: States must have unique names. State "
@@ -58,139 +113,331 @@ class Diagram:
             raise ValueError("Non unique state names.")
 
     def MakeLeftRightPoints(self):
+        """
+        Lay the states out as parallel arrays (in the order of states) and resolve their links.
+        """
         columnWidth = 1
+        states = self.states
 
-        for _, state in self.statesList.items():
-            state.leftPointx = (
-                state.column * columnWidth + state.column * columnWidth / 2.0
-            )
-            state.leftPointy = state.energy
-            state.rightPointx = state.leftPointx + columnWidth
-            state.rightPointy = state.energy
-
-    def Draw(self):
-        self.ax.axhline(0.0, color="gray", linestyle=":")
-
-        #   Draw the states
-        for key in self.statesList.keys():
-            state = self.statesList[key]
-            self.ax.plot(
-                [state.leftPointx, state.rightPointx],
-                [state.leftPointy, state.rightPointy],
-                c=state.color,
-                lw=3,
-                ls="-",
-                label=state.legend,
-            )
+        self.energies = np.array([state.energy for state in states], dtype=float)
+        self.left_x = (
+            np.array([state.column for state in states], dtype=float)
+            * columnWidth
+            * 1.5
+        )
+        self.right_x = self.left_x + columnWidth
 
-        #   Draw their labels
-        offset = self.ax.get_ylim()
-        offset = offset[1] * 0.01
-        for key in self.statesList.keys():
-            state: State = self.statesList[key]
-            y_point = state.leftPointy + state.labelOffset[1] + offset
-            if self.sorted_y_lims is None or (
-                self.sorted_y_lims[0] <= y_point <= self.sorted_y_lims[1]
-            ):
-                self.ax.annotate(
-                    state.label,
-                    (state.leftPointx + state.labelOffset[0], y_point),
-                    color=state.labelColor,
-                    verticalalignment="bottom",
-                    annotation_clip=True,
-                )
+        #   Parse the links once into source/destination index arrays
+        link_src = []
+        link_dst = []
+        self.link_colors = []
+        parsed_colors = {}  # Links mostly reuse a handful of colours
+        seen_links = set()  # Identical links would only be drawn over each other
+        for i, state in enumerate(states):
+            if state.linksTo != "":
+                for link in state.linksTo.split(","):
+                    link = link.strip()
+                    raw = link.split(":")
+                    dest = raw[0]
+                    if len(raw) > 1:
+                        color = raw[1]
+                    else:
+                        color = "BLACK"
+                    j = self.state_index.get(dest)
+                    if j is not None:
+                        if color not in parsed_colors:
+                            parsed_colors[color] = ParseColor(color, state.name)
+                        color = parsed_colors[color]
+                        if (i, j, color) in seen_links:
+                            continue
+                        seen_links.add((i, j, color))
+                        link_src.append(i)
+                        link_dst.append(j)
+                        self.link_colors.append(color)
+                    else:
+                        print("Name: " + dest + " is unknown.")
+        self.link_src = np.array(link_src, dtype=int)
+        self.link_dst = np.array(link_dst, dtype=int)
 
-            y_point = state.leftPointy + state.textOffset[1] - offset
-            if state.show_energy and (
-                self.sorted_y_lims is None
-                or (self.sorted_y_lims[0] <= y_point <= self.sorted_y_lims[1])
-            ):
-                self.ax.annotate(
-                    f"  {state.energy:6.3f}",
-                    (state.leftPointx + state.textOffset[0], y_point),
-                    color=state.labelColor,
-                    verticalalignment="top",
-                    annotation_clip=True,
-                )
+    def InView(self, x_points, y_points):
+        """
+        Boolean mask of the points lying inside the final axes limits, as annotation_clip would test.
+        """
+        x_points = np.asarray(x_points)
+        y_points = np.asarray(y_points)
+        xlim = sorted(self.ax.get_xlim())
+        ylim = sorted(self.ax.get_ylim())
+        return (
+            (xlim[0] <= x_points)
+            & (x_points <= xlim[1])
+            & (ylim[0] <= y_points)
+            & (y_points <= ylim[1])
+        )
 
-        # Now xrange is set by other things, fit the images
-        # This requires some conversion between data coordinates and axes coordinates
-        # As we want to position and scale the image in data space, but preserve the aspect ratio
-        # in axes space...
+    def ImageExtents(self):
+        """
+        Data extent (left, right, bottom, top) of each state's image, keyed by state index.
 
+        The width runs along the state line, and the height keeps the image aspect on the page
+        for the current axes limits and position.
+        """
         xlim = self.ax.get_xlim()
-        x_range = xlim[1] - xlim[0]
         ylim = self.ax.get_ylim()
-        y_range = ylim[1] - xlim[0]
-        ax_aspect = (
-            x_range / y_range
-        )  # Save the current axis aspect ratio for later restoration
+        x_range = xlim[1] - xlim[0]
+        y_range = ylim[1] - ylim[0]
+        ax_box = self.ax.get_position()
+        box_aspect = (ax_box.width * self.fig.get_figwidth()) / (
+            ax_box.height * self.fig.get_figheight()
+        )  # Width/Height of the axes on the page
 
-        for key in self.statesList.keys():
-            state = self.statesList[key]
+        image_extents = {}
+        for i, state in enumerate(self.states):
             if state.image is not None:
                 aspect_ratio = (
                     state.image.shape[1] / state.image.shape[0]
                 )  # Width/Height
+                data_left = self.left_x[i] + state.imageOffset[0]
+                data_right = self.right_x[i] * state.imageScale + state.imageOffset[0]
+                data_bottom = self.energies[i] + state.imageOffset[1]
 
-                # Determine desired image characteristics in axes coordinates
-                axes_left = (state.leftPointx - xlim[0]) / x_range
-                axes_right = (state.rightPointx - xlim[0]) / x_range
-                axes_width = axes_right - axes_left
-                axes_bottom = (state.leftPointy - ylim[0]) / y_range
-                axes_height = axes_width / aspect_ratio
-                axes_top = axes_bottom + axes_height
-
-                # Now use them to find data coordinates
-                data_left = state.leftPointx
-                data_right = state.rightPointx * state.imageScale
-                data_bottom = state.leftPointy
-                data_top = (ylim[0] + axes_top * y_range) * state.imageScale
-
-                self.ax.imshow(
-                    state.image,
-                    extent=(
-                        data_left + state.imageOffset[0],
-                        data_right + state.imageOffset[0],
-                        data_bottom + state.imageOffset[1],
-                        data_top + state.imageOffset[1],
-                    ),
-                    aspect=aspect_ratio,
-                    interpolation="lanczos",
+                # Convert the width to axes coordinates to find the height there, then back
+                axes_height = (
+                    (data_right - data_left) / x_range * box_aspect / aspect_ratio
+                )
+                image_extents[i] = (
+                    data_left,
+                    data_right,
+                    data_bottom,
+                    data_bottom + axes_height * y_range,
                 )
+        return image_extents
 
-        #   Draw the dashed lines connecting them
-        for key in self.statesList.keys():
-            state = self.statesList[key]
-            if state.linksTo != "":
-                for link in state.linksTo.split(","):
-                    link = link.strip()
-                    raw = link.split(":")
-                    dest = raw[0]
-                    if len(raw) > 1:
-                        color = raw[1]
-                    else:
-                        color = "BLACK"
-                    if dest in self.statesList:
-                        self.ax.plot(
-                            [state.rightPointx, self.statesList[dest].leftPointx],
-                            [state.rightPointy, self.statesList[dest].leftPointy],
-                            c=color,
-                            ls="--",
-                            lw=1,
-                        )
-                    else:
-                        print("Name: " + dest + " is unknown.")
+    def FitMargins(self):
+        """
+        Set the figure margins from the font sizes and the y tick labels, without measuring them.
+        """
+        tick_size = FontProperties(size=matplotlib.rcParams["ytick.labelsize"])
+        tick_size = tick_size.get_size_in_points()
+        label_size = FontProperties(size=matplotlib.rcParams["axes.labelsize"])
+        label_size = label_size.get_size_in_points()
 
-        self.ax.set_ylabel(str(self.energyUnits))
+        ylim = sorted(self.ax.get_ylim())
+        ticks = [tick for tick in self.ax.get_yticks() if ylim[0] <= tick <= ylim[1]]
+        tick_labels = self.ax.yaxis.get_major_formatter().format_ticks(ticks)
+        tick_chars = max([len(label) for label in tick_labels] + [1])
+
+        #   All in points, roughly 0.6 em per character of a tick label
+        left = (
+            tick_chars * 0.6 * tick_size
+            + matplotlib.rcParams["ytick.major.size"]
+            + matplotlib.rcParams["ytick.major.pad"]
+            + 0.5 * tick_size
+        )
+        if str(self.energyUnits) != "":
+            left += 1.2 * label_size + matplotlib.rcParams["axes.labelpad"]
+        vertical = (
+            0.8 * tick_size
+        )  # Half a tick label sticks out from each end of the axis
+
+        width = self.fig.get_figwidth() * 72.0
+        height = self.fig.get_figheight() * 72.0
+        self.fig.subplots_adjust(
+            left=min(left / width, 0.5),
+            right=1.0 - min(vertical / width, 0.25),
+            top=1.0 - min(vertical / height, 0.25),
+            bottom=min(vertical / height, 0.25),
+        )
+
+    def Draw(self):
+        with matplotlib.rc_context(self.rc):
+            self._Draw()
+
+    def _Draw(self):
+        states = self.states
+        self.ax.axhline(0.0, color="gray", linestyle=":")
+
+        #   Draw the states, as a single collection rather than one line per state
+        left_x = self.left_x
+        right_x = self.right_x
+        energies = self.energies
+        segments = np.stack([np.c_[left_x, energies], np.c_[right_x, energies]], axis=1)
+
+        #   The limits come from every state, including any culled below, so the layout is unchanged
+        self.ax.update_datalim(segments.reshape(-1, 2))
+        self.ax.autoscale_view()
+
+        offset = self.ax.get_ylim()[1] * 0.01
         if self.y_lims is not None:
             self.ax.set_ylim(self.y_lims)
+
+        #   Images sit on top of their states and can reach past them, so grow the limits to
+        #   fit them. Their heights depend on the limits in turn, so repeat until they settle.
+        #   After that nothing else changes the limits, so fix them now rather than have
+        #   matplotlib re-autoscale as each further artist is added.
+        image_extents = self.ImageExtents()
+        for _ in range(10):
+            if not image_extents:
+                break
+            limits = (self.ax.get_xlim(), self.ax.get_ylim())
+            corners = np.array(
+                [[extent[0], extent[2]] for extent in image_extents.values()]
+                + [[extent[1], extent[3]] for extent in image_extents.values()]
+            )
+            self.ax.update_datalim(corners)
+            self.ax.autoscale_view()
+            if np.allclose(limits, (self.ax.get_xlim(), self.ax.get_ylim())):
+                break
+            image_extents = self.ImageExtents()
+        self.ax.set_autoscale_on(False)
+
+        label_offsets = np.array([state.labelOffset for state in states], dtype=float)
+        text_offsets = np.array([state.textOffset for state in states], dtype=float)
+        label_offsets = label_offsets.reshape(-1, 2)
+        text_offsets = text_offsets.reshape(-1, 2)
+
+        #   Cull states whose line and texts all lie outside the energy range, rather than have
+        #   matplotlib build and clip artists that can never be seen
+        if self.sorted_y_lims is None:
+            visible = np.ones(len(states), dtype=bool)
+        else:
+            pad = np.maximum(
+                np.abs(label_offsets[:, 1]), np.abs(text_offsets[:, 1])
+            ) + abs(offset)
+            visible = (energies + pad >= self.sorted_y_lims[0]) & (
+                energies - pad <= self.sorted_y_lims[1]
+            )
+
+        self.ax.add_collection(
+            LineCollection(
+                segments[visible],
+                colors=[states[i].color for i in np.flatnonzero(visible)],
+                linewidths=3,
+                linestyles="solid",
+                capstyle="projecting",
+                zorder=2,
+            ),
+            autolim=False,
+        )
+
+        #   The collection carries no legend entries, so add an empty proxy line for each
+        legends = []
+        for state in states:
+            if state.legend is not None and state.legend not in legends:
+                legends.append(state.legend)
+                self.ax.plot([], [], c=state.color, lw=3, ls="-", label=state.legend)
+
+        #   Draw their labels
+        #   Plain text is cheaper than annotations here, we never need an arrow or coordinate
+        #   conversion. The limits are final by now, so drop the texts anchored outside the axes
+        #   first (what annotation_clip did when drawing) and only draw the visible ones.
+        label_x = left_x + label_offsets[:, 0]
+        label_y = energies + label_offsets[:, 1] + offset
+        text_x = left_x + text_offsets[:, 0]
+        text_y = energies + text_offsets[:, 1] - offset
+        label_in_range, text_in_range = self.InView(
+            np.vstack([label_x, text_x]), np.vstack([label_y, text_y])
+        )
+
+        for i in np.flatnonzero(label_in_range):
+            self.ax.text(
+                label_x[i],
+                label_y[i],
+                states[i].label,
+                color=states[i].labelColor,
+                verticalalignment="bottom",
+                transform=self.ax.transData,
+                clip_on=False,
+            )
+
+        show_energy = np.array([state.show_energy for state in states], dtype=bool)
+        shown = np.flatnonzero(show_energy & text_in_range)
+        energy_texts = [f"  {energies[i]:6.3f}" for i in shown]
+        for i, energy_text in zip(shown, energy_texts):
+            self.ax.text(
+                text_x[i],
+                text_y[i],
+                energy_text,
+                color=states[i].labelColor,
+                verticalalignment="top",
+                transform=self.ax.transData,
+                clip_on=False,
+            )
+
+        images = []
+        for i, extent in image_extents.items():
+            state = states[i]
+            if self.sorted_y_lims is not None and (
+                extent[3] < self.sorted_y_lims[0] or extent[2] > self.sorted_y_lims[1]
+            ):
+                continue  # Entirely outside the energy range
+
+            artist = self.ax.imshow(
+                state.image,
+                extent=extent,
+                aspect="auto",  # The extent already preserves the image aspect
+                interpolation="nearest",
+                rasterized=True,  # Only the bitmap is rasterised in vector output
+                zorder=0,
+            )
+            images.append((artist, state.image, extent))
+
+        #   Draw the dashed lines connecting them
+        #   A link is only out of sight if both of its ends are on the same side of the range
+        if self.sorted_y_lims is None:
+            link_visible = np.ones(len(self.link_src), dtype=bool)
+        else:
+            below = energies < self.sorted_y_lims[0]
+            above = energies > self.sorted_y_lims[1]
+            link_visible = ~(
+                (below[self.link_src] & below[self.link_dst])
+                | (above[self.link_src] & above[self.link_dst])
+            )
+        if link_visible.any():
+            src = self.link_src[link_visible]
+            dst = self.link_dst[link_visible]
+            link_colors = [
+                color for color, shown in zip(self.link_colors, link_visible) if shown
+            ]
+            link_segments = np.stack(
+                [np.c_[right_x[src], energies[src]], np.c_[left_x[dst], energies[dst]]],
+                axis=1,
+            )
+            self.ax.add_collection(
+                LineCollection(
+                    link_segments,
+                    colors=link_colors,
+                    linewidths=1,
+                    linestyles="dashed",
+                    zorder=2,
+                )
+            )
+
+        self.ax.set_ylabel(str(self.energyUnits))
         self.ax.set_xticks([])
         if self.do_legend:
             self.ax.legend()
 
-        self.fig.tight_layout()
-        self.fig.savefig(self.outputName)
+        #   tight_layout re-measures every artist, "tight-layout = false" swaps it for margins
+        #   estimated from the font sizes, which is quicker
+        if self.tight_layout:
+            self.fig.tight_layout()
+        else:
+            self.FitMargins()
+
+        #   With the layout final, set each image's top so it keeps its aspect on the page, and
+        #   resample it once to the pixels it covers, rather than have matplotlib filter the full
+        #   size bitmap when drawing
+        to_pixels = self.ax.transData
+        for artist, image, extent in images:
+            left, bottom = to_pixels.transform((extent[0], extent[2]))
+            right = to_pixels.transform((extent[1], extent[2]))[0]
+            width = abs(right - left)
+            height = width * image.shape[0] / image.shape[1]
+            top = to_pixels.inverted().transform((left, bottom + height))[1]
+            artist.set_extent((extent[0], extent[1], extent[2], top))
+            artist.set_data(ResampleImage(image, width, height))
+
+        self.fig.savefig(self.outputName, dpi=self.fig.dpi)
 
 
 class State:
@@ -201,14 +448,10 @@ class State:
         self.linksTo = ""
         self.label = ""
         self.legend = None
-        self._energy = 0.0
-        self.energy_shift = 0.0
+        self.energy = 0.0
+        self.energy_shift = 0.0  # Folded into energy once the input has been read
         self.normalisedPosition = 0.0
         self.column = 1
-        self.leftPointx = 0
-        self.leftPointy = 0
-        self.rightPointx = 0
-        self.rightPointy = 0
         self.labelOffset = (0, 0)
         self.textOffset = (0, 0)
         self.imageOffset = (0, 0)
@@ -216,13 +459,32 @@ class State:
         self.image = None
         self.show_energy = True
 
-    @property
-    def energy(self):
-        return self._energy + self.energy_shift
 
-    @energy.setter
-    def energy(self, value):
-        self._energy = value
+def ParseColor(color, name):
+    """
+    Convert a matplotlib colour definition to an RGBA tuple, reporting the state it came from.
+    """
+    try:
+        return to_rgba(color)
+    except ValueError:
+        print("ERROR: Could not understand colour " + str(color) + " of state " + name)
+        raise
+
+
+def ResampleImage(image, width, height):
+    """
+    Lanczos resample an image array (as from plt.imread) to width x height pixels using Pillow.
+
+    The result keeps the dtype and value range of the input, so that it can replace the data of
+    an image already drawn without changing how it is normalised.
+    """
+    width = max(int(round(width)), 1)
+    height = max(int(round(height)), 1)
+    if image.dtype.kind != "f":
+        return np.asarray(Image.fromarray(image).resize((width, height), Image.LANCZOS))
+    scaled = np.clip(image * 255.0, 0, 255).astype(np.uint8)
+    resized = np.asarray(Image.fromarray(scaled).resize((width, height), Image.LANCZOS))
+    return (resized / 255.0).astype(image.dtype)
 
 
 ######################################################################################################
@@ -230,261 +492,277 @@ class State:
 ######################################################################################################
 
 
-def ReadInput(filename):
+def _ReadPair(raw, lc, line, what):
+    """
+    Read an "x,y" pair of reals from the value of a state line, or None if it cannot be read.
+    """
+    raw[1] = raw[1].split(",")
     try:
-        inp = open(filename, "r")
-    except:
-        print("Error opening file. File: " + filename + " may not exist.")
-        raise SystemExit("Could not open Input file: {:}".format(filename))
+        return (float(raw[1][0]), float(raw[1][1]))
+    except ValueError:
+        print(
+            "ERROR: Could not read real number for "
+            + what
+            + " on line "
+            + str(lc)
+            + ":\n\t"
+            + line
+        )
+        return None
 
-    stateBlock = False
-    statesList = []
-    width = 0
-    height = 0
-    global_shift = 0.0
-    fontSize = 8
-    energyUnits = ""
-    y_lims = None
-    lc = 0
-    for line in inp:
-        lc += 1
-        line = line.strip()
-        if len(line) > 0 and line.strip()[0] != "#":
-            if stateBlock:
-                if line.strip()[0] == "{":
-                    print(
-                        "Unexpected opening '{' within state block on line "
-                        + str(lc)
-                        + ".\nPossible forgotten closing '}'."
-                    )
-                    raise ValueError("ERROR: Unexpected { on line " + str(lc))
-                if line.strip()[0] == "}":
-                    stateBlock = False
-                else:
-                    raw = line.split("=")
 
-                    raw[0] = raw[0].upper().strip()
+def _SetName(state, raw, lc, line):
+    state.name = raw[1].upper()
 
-                    try:
-                        raw[1] = raw[1].strip()
-                    except IndexError:
-                        pass
-
-                    if raw[0] == "NAME":
-                        statesList[-1].name = raw[1].upper()
-                    elif (
-                        raw[0] == "TEXTCOLOR"
-                        or raw[0] == "TEXTCOLOUR"
-                        or raw[0] == "TEXT-COLOUR"
-                        or raw[0] == "TEXT-COLOR"
-                        or raw[0] == "TEXT COLOUR"
-                        or raw[0] == "TEXT COLOR"
-                    ):
-                        statesList[-1].color = raw[1]
-                    elif raw[0] == "LABEL":
-                        statesList[-1].label = ""
-                        for i in range(1, len(raw)):
-                            statesList[-1].label += raw[i]
-                            if i < len(raw) - 1:
-                                statesList[-1].label += " = "
-                    elif raw[0] == "LABELCOLOR" or raw[0] == "LABELCOLOUR":
-                        statesList[-1].labelColor = raw[1]
-                    elif raw[0] == "LINKSTO" or raw[0] == "LINKS TO":
-                        statesList[-1].linksTo = raw[1].upper()
-                    elif raw[0] == "COLUMN":
-                        try:
-                            statesList[-1].column = int(raw[1]) - 1
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read integer for column number on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif raw[0] == "ENERGY":
-                        try:
-                            statesList[-1].energy = float(raw[-1])
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read real number for energy on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif raw[0] == "ENERGY SHIFT":
-                        try:
-                            statesList[-1].energy_shift = float(raw[-1])
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read real number for energy on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif (
-                        raw[0] == "LABELOFFSET"
-                        or raw[0] == "LABEL OFFSET"
-                        or raw[0] == "LABEL-OFFSET"
-                    ):
-                        raw[1] = raw[1].split(",")
-                        try:
-                            tx = float(raw[1][0])
-                            ty = float(raw[1][1])
-                            statesList[-1].labelOffset = (tx, ty)
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read real number for label offset on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif (
-                        raw[0] == "TEXTOFFSET"
-                        or raw[0] == "TEXT OFFSET"
-                        or raw[0] == "TEXT-OFFSET"
-                    ):
-                        raw[1] = raw[1].split(",")
-                        try:
-                            tx = float(raw[1][0])
-                            ty = float(raw[1][1])
-                            statesList[-1].textOffset = (tx, ty)
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read real number for text offset on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif raw[0] == "LEGEND":
-                        statesList[-1].legend = raw[1]
-                    elif raw[0] == "IMAGE":
-                        try:
-                            statesList[-1].image = plt.imread(raw[-1])
-                        except IOError:
-                            raise IOError("Failed to find image on line {:}".format(lc))
-                    elif "IMAGE" in raw[0] and "OFFSET" in raw[0]:
-                        raw[1] = raw[1].split(",")
-                        try:
-                            tx = float(raw[1][0])
-                            ty = float(raw[1][1])
-                            statesList[-1].imageOffset = (tx, ty)
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read real number for image offset on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif "IMAGE" in raw[0] and "SCALE" in raw[0]:
-                        try:
-                            scale = float(raw[1])
-                            if scale < 0.1:
-                                print("image scale cannot be < 0.1, setting to 0.1/")
-                            statesList[-1].imageScale = max(scale, 0.1)
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read real number for image scale on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif "HIDE" in raw[0] and "ENERGY" in raw[0]:
-                        statesList[-1].show_energy = False
-                    else:
-                        print("Ignoring unrecognised line " + str(lc) + ":\n\t" + line)
-            elif line.strip()[0] == "{":
-                statesList.append(State())
-                stateBlock = True  # we have entered a state block
 
-            elif line.strip()[0] == "}":
-                print("WARNING: Not expecting closing } on line: " + str(lc))
+def _SetColor(state, raw, lc, line):
+    state.color = raw[1]
+
+
+def _SetLabel(state, raw, lc, line):
+    state.label = raw[1]
+
+
+def _SetLabelColor(state, raw, lc, line):
+    state.labelColor = raw[1]
+
+
+def _SetLinksTo(state, raw, lc, line):
+    state.linksTo = raw[1].upper()
+
+
+def _SetColumn(state, raw, lc, line):
+    try:
+        state.column = int(raw[1]) - 1
+    except ValueError:
+        print(
+            "ERROR: Could not read integer for column number on line "
+            + str(lc)
+            + ":\n\t"
+            + line
+        )
+
+
+def _SetEnergy(state, raw, lc, line):
+    try:
+        state.energy = float(raw[-1])
+    except ValueError:
+        print(
+            "ERROR: Could not read real number for energy on line "
+            + str(lc)
+            + ":\n\t"
+            + line
+        )
+
+
+def _SetEnergyShift(state, raw, lc, line):
+    try:
+        state.energy_shift = float(raw[-1])
+    except ValueError:
+        print(
+            "ERROR: Could not read real number for energy on line "
+            + str(lc)
+            + ":\n\t"
+            + line
+        )
+
+
+def _SetLabelOffset(state, raw, lc, line):
+    pair = _ReadPair(raw, lc, line, "label offset")
+    if pair is not None:
+        state.labelOffset = pair
+
+
+def _SetTextOffset(state, raw, lc, line):
+    pair = _ReadPair(raw, lc, line, "text offset")
+    if pair is not None:
+        state.textOffset = pair
+
+
+def _SetLegend(state, raw, lc, line):
+    state.legend = raw[1]
+
+
+@functools.lru_cache(maxsize=None)
+def _LoadImage(path):
+    """
+    Read an image once per file, states showing the same picture share one read-only array.
+    The cache only lives while one input is read, see _BuildDiagram.
+    """
+    image = plt.imread(path)
+    image.setflags(write=False)
+    return image
+
+
+def _SetImage(state, raw, lc, line):
+    try:
+        state.image = _LoadImage(raw[-1])
+    except IOError:
+        raise IOError("Failed to find image on line {:}".format(lc))
+
+
+def _SetImageOffset(state, raw, lc, line):
+    pair = _ReadPair(raw, lc, line, "image offset")
+    if pair is not None:
+        state.imageOffset = pair
+
+
+def _SetImageScale(state, raw, lc, line):
+    try:
+        scale = float(raw[1])
+        if scale < 0.1:
+            print("image scale cannot be < 0.1, setting to 0.1/")
+        state.imageScale = max(scale, 0.1)
+    except ValueError:
+        print(
+            "ERROR: Could not read real number for image scale on line "
+            + str(lc)
+            + ":\n\t"
+            + line
+        )
+
+
+def _HideEnergy(state, raw, lc, line):
+    state.show_energy = False
+
+
+#   Splits a stripped "key = value" line, the value may itself contain "=" (e.g. labels)
+KEY_VALUE = re.compile(r"([^=]*?)\s*=\s*(.*)")
+
+#   Alternative spellings of the state keys, after spaces and underscores become dashes
+KEY_ALIASES = {
+    "TEXTCOLOR": "COLOR",
+    "TEXTCOLOUR": "COLOR",
+    "TEXT-COLOR": "COLOR",
+    "TEXT-COLOUR": "COLOR",
+    "LABELCOLOR": "LABEL-COLOR",
+    "LABELCOLOUR": "LABEL-COLOR",
+    "LABEL-COLOUR": "LABEL-COLOR",
+    "LINKSTO": "LINKS-TO",
+    "LABELOFFSET": "LABEL-OFFSET",
+    "TEXTOFFSET": "TEXT-OFFSET",
+}
+
+STATE_HANDLERS = {
+    "NAME": _SetName,
+    "COLOR": _SetColor,
+    "LABEL": _SetLabel,
+    "LABEL-COLOR": _SetLabelColor,
+    "LINKS-TO": _SetLinksTo,
+    "COLUMN": _SetColumn,
+    "ENERGY": _SetEnergy,
+    "ENERGY-SHIFT": _SetEnergyShift,
+    "LABEL-OFFSET": _SetLabelOffset,
+    "TEXT-OFFSET": _SetTextOffset,
+    "LEGEND": _SetLegend,
+    "IMAGE": _SetImage,
+    "IMAGE-OFFSET": _SetImageOffset,
+    "IMAGE-SCALE": _SetImageScale,
+    "HIDE-ENERGY": _HideEnergy,
+}
+
+
+def CanonicalStateKey(key):
+    """
+    Map an upper case state key as written in the input onto its STATE_HANDLERS entry.
+    """
+    key = key.replace(" ", "-").replace("_", "-")
+    key = KEY_ALIASES.get(key, key)
+    if key in STATE_HANDLERS:
+        return key
+    #   The image and hide energy options are matched loosely
+    if "IMAGE" in key and "OFFSET" in key:
+        return "IMAGE-OFFSET"
+    if "IMAGE" in key and "SCALE" in key:
+        return "IMAGE-SCALE"
+    if "HIDE" in key and "ENERGY" in key:
+        return "HIDE-ENERGY"
+    return key
+
+
+#   The global options, and their alternative spellings after spaces and underscores become dashes
+GLOBAL_KEYS = {
+    "OUTPUT-FILE",
+    "WIDTH",
+    "HEIGHT",
+    "GLOBAL-SHIFT",
+    "ENERGY-UNITS",
+    "FONT-SIZE",
+    "ENERGY-RANGE",
+    "DPI",
+    "TIGHT-LAYOUT",
+}
+
+GLOBAL_ALIASES = {
+    "OUTPUT": "OUTPUT-FILE",
+    "TIGHTLAYOUT": "TIGHT-LAYOUT",
+    "ENERGYUNITS": "ENERGY-UNITS",
+    "FONTSIZE": "FONT-SIZE",
+}
+
+
+def CanonicalGlobalKey(key):
+    """
+    Map an upper case global option as written in the input onto its GLOBAL_KEYS entry.
+    """
+    key = key.replace(" ", "-").replace("_", "-")
+    key = GLOBAL_ALIASES.get(key, key)
+    if key in GLOBAL_KEYS:
+        return key
+    #   The energy range is matched loosely
+    if "ENERGY" in key and "RANGE" in key:
+        return "ENERGY-RANGE"
+    return key
+
+
+def _ReadBool(value):
+    """
+    Read a true/false input value, returns None if it is neither.
+    """
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().upper()
+    if value in ("TRUE", "YES", "ON", "1"):
+        return True
+    if value in ("FALSE", "NO", "OFF", "0"):
+        return False
+    return None
+
+
+def _OutputFileName(name):
+    """
+    The output file name, with .pdf added unless matplotlib can save to its extension.
+    """
+    extension = os.path.splitext(name)[1][1:].lower()
+    if extension not in FigureCanvasBase.get_supported_filetypes():
+        print(
+            "WARNING: Output will be .pdf. Adding this to output file.\nFile will be saved as "
+            + name
+            + ".pdf"
+        )
+        return name + ".pdf"
+    return name
+
+
+def _BuildDiagram(
+    statesList,
+    width,
+    height,
+    fontSize,
+    outName,
+    y_lims,
+    dpi,
+    tight_layout,
+    energyUnits,
+    global_shift,
+    fig,
+):
+    """
+    Check the global options read from an input and assemble the Diagram holding its states.
+    """
+    #   The states now hold their images, so don't keep them alive for later inputs of a batch
+    _LoadImage.cache_clear()
 
-            else:
-                """
-                READING GLOBAL OPTIONS
-                """
-                raw = line.split("=")
-                if len(raw) != 2:
-                    print("Ignoring unrecognised line " + str(lc) + ":\n\t" + line)
-                else:
-                    raw[0] = raw[0].upper().strip()
-                    raw[1] = raw[1].strip().lstrip()
-                    if raw[0] == "GLOBAL-SHIFT":
-                        global_shift = float(raw[1])
-                    elif raw[0] == "WIDTH":
-                        try:
-                            width = int(raw[1])
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read integer for diagram width on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif raw[0] == "HEIGHT":
-                        try:
-                            height = int(raw[1])
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read integer for diagram height on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                    elif raw[0] == "OUTPUT-FILE" or raw[0] == "OUTPUT":
-                        raw[1] = raw[1].lstrip()
-                        if not raw[1].endswith(".pdf"):
-                            print(
-                                "WARNING: Output will be .pdf. Adding this to output file.\nFile will be saved as "
-                                + raw[1]
-                                + ".pdf"
-                            )
-                            outName = raw[1] + ".pdf"
-                        else:
-                            outName = raw[1]
-                    elif (
-                        raw[0] == "ENERGY-UNITS"
-                        or raw[0] == "ENERGYUNITS"
-                        or raw[0] == "ENERGY UNITS"
-                    ):
-                        energyUnits = raw[1]
-                    elif (
-                        raw[0] == "FONT-SIZE"
-                        or raw[0] == "FONTSIZE"
-                        or raw[0] == "FONT SIZE"
-                    ):
-                        try:
-                            fontSize = int(raw[1])
-                            plt.rcParams.update({"font.size": fontSize})
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read integer for font size on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                            print("Default will be used...")
-                    elif "ENERGY" in raw[0] and "RANGE" in raw[0]:
-                        try:
-                            y_lims = [float(l) for l in raw[1].split(",")]
-                            assert (
-                                len(y_lims) == 2
-                            ), "Must have two comma separated numbers for range."
-                        except ValueError:
-                            print(
-                                "ERROR: Could not read floats for energy range on line "
-                                + str(lc)
-                                + ":\n\t"
-                                + line
-                            )
-                            print("e.g: ENERGY RANGE = -1, 2")
-                            print("Automatic range will be used...")
-                    else:
-                        print(
-                            "WARNING: Skipping unknown line " + str(lc) + ":\n\t" + line
-                        )
-    if stateBlock:
-        print("WARNING: Final closing '}' is missing.")
     if height == 0:
         print("ERROR: Image height not set! e.g.:\nheight = 500")
         raise ValueError("Height not set")
@@ -495,11 +773,13 @@ def ReadInput(filename):
         print("ERROR: output file name not set! e.g.:\n output-file = example.pdf")
         raise ValueError("Output name not set")
 
-    outDiagram = Diagram(width, height, fontSize, outName, y_lims)
+    outDiagram = Diagram(width, height, fontSize, outName, y_lims, dpi, fig)
     outDiagram.energyUnits = energyUnits
+    outDiagram.tight_layout = tight_layout
     maxColumn = 0
     for state in statesList:
-        state._energy -= global_shift
+        state.energy += state.energy_shift - global_shift
+        state.energy_shift = 0.0
         outDiagram.AddState(state)
         if state.column > maxColumn:
             maxColumn = state.column
@@ -508,13 +788,293 @@ def ReadInput(filename):
     return outDiagram
 
 
+def ReadInput(filename, fig=None):
+    try:
+        with open(filename, "r", encoding="utf-8") as inp:
+            lines = inp.read().splitlines()
+    except IOError:
+        print("Error opening file. File: " + filename + " may not exist.")
+        raise SystemExit("Could not open Input file: {:}".format(filename))
+    except UnicodeDecodeError as error:
+        print("Error reading file. File: " + filename + " is not UTF-8 encoded text.")
+        print(error)
+        raise SystemExit("Could not read Input file: {:}".format(filename))
+
+    stateBlock = False
+    statesList = []
+    width = 0
+    height = 0
+    global_shift = 0.0
+    fontSize = None
+    energyUnits = ""
+    y_lims = None
+    dpi = None
+    tight_layout = True
+    outName = ""
+    for lc, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        first = line[0]
+        if stateBlock:
+            if first == "{":
+                print(
+                    "Unexpected opening '{' within state block on line "
+                    + str(lc)
+                    + ".\nPossible forgotten closing '}'."
+                )
+                raise ValueError("ERROR: Unexpected { on line " + str(lc))
+            if first == "}":
+                stateBlock = False
+            else:
+                match = KEY_VALUE.match(line)
+                if match is not None:
+                    raw = [match.group(1).upper(), match.group(2)]
+                else:
+                    raw = [line.upper()]  # Flags such as "hide energy" have no value
+
+                handler = STATE_HANDLERS.get(CanonicalStateKey(raw[0]))
+                if handler is not None:
+                    handler(statesList[-1], raw, lc, line)
+                else:
+                    print("Ignoring unrecognised line " + str(lc) + ":\n\t" + line)
+        elif first == "{":
+            statesList.append(State())
+            stateBlock = True  # we have entered a state block
+
+        elif first == "}":
+            print("WARNING: Not expecting closing } on line: " + str(lc))
+
+        else:
+            """
+            READING GLOBAL OPTIONS
+            """
+            match = KEY_VALUE.match(line)
+            if match is None or "=" in match.group(2):
+                print("Ignoring unrecognised line " + str(lc) + ":\n\t" + line)
+            else:
+                raw = [CanonicalGlobalKey(match.group(1).upper()), match.group(2)]
+                if raw[0] == "GLOBAL-SHIFT":
+                    global_shift = float(raw[1])
+                elif raw[0] == "WIDTH":
+                    try:
+                        width = int(raw[1])
+                    except ValueError:
+                        print(
+                            "ERROR: Could not read integer for diagram width on line "
+                            + str(lc)
+                            + ":\n\t"
+                            + line
+                        )
+                elif raw[0] == "HEIGHT":
+                    try:
+                        height = int(raw[1])
+                    except ValueError:
+                        print(
+                            "ERROR: Could not read integer for diagram height on line "
+                            + str(lc)
+                            + ":\n\t"
+                            + line
+                        )
+                elif raw[0] == "OUTPUT-FILE":
+                    outName = _OutputFileName(raw[1])
+                elif raw[0] == "TIGHT-LAYOUT":
+                    tight_layout = _ReadBool(raw[1])
+                    if tight_layout is None:
+                        print(
+                            "ERROR: Could not read true or false for tight layout on line "
+                            + str(lc)
+                            + ":\n\t"
+                            + line
+                        )
+                        print("Default will be used...")
+                        tight_layout = True
+                elif raw[0] == "DPI":
+                    try:
+                        dpi = int(raw[1])
+                    except ValueError:
+                        print(
+                            "ERROR: Could not read integer for dpi on line "
+                            + str(lc)
+                            + ":\n\t"
+                            + line
+                        )
+                        print("Default will be used...")
+                elif raw[0] == "ENERGY-UNITS":
+                    energyUnits = raw[1]
+                elif raw[0] == "FONT-SIZE":
+                    try:
+                        fontSize = int(raw[1])
+                    except ValueError:
+                        print(
+                            "ERROR: Could not read integer for font size on line "
+                            + str(lc)
+                            + ":\n\t"
+                            + line
+                        )
+                        print("Default will be used...")
+                elif raw[0] == "ENERGY-RANGE":
+                    try:
+                        y_lims = [float(l) for l in raw[1].split(",")]
+                        assert (
+                            len(y_lims) == 2
+                        ), "Must have two comma separated numbers for range."
+                    except ValueError:
+                        print(
+                            "ERROR: Could not read floats for energy range on line "
+                            + str(lc)
+                            + ":\n\t"
+                            + line
+                        )
+                        print("e.g: ENERGY RANGE = -1, 2")
+                        print("Automatic range will be used...")
+                else:
+                    print("WARNING: Skipping unknown line " + str(lc) + ":\n\t" + line)
+    if stateBlock:
+        print("WARNING: Final closing '}' is missing.")
+    return _BuildDiagram(
+        statesList,
+        width,
+        height,
+        fontSize,
+        outName,
+        y_lims,
+        dpi,
+        tight_layout,
+        energyUnits,
+        global_shift,
+        fig,
+    )
+
+
+def _ReadConfigPair(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    if len(value) != 2:
+        raise ValueError("Must have two comma separated numbers, got " + repr(value))
+    return (float(value[0]), float(value[1]))
+
+
+def _ReadConfigBool(value):
+    flag = _ReadBool(value)
+    if flag is None:
+        raise ValueError("Must be true or false, got " + repr(value))
+    return flag
+
+
+def _ReadConfigLinks(value):
+    if not isinstance(value, str):
+        value = ",".join(value)
+    return value.upper()
+
+
+#   State attributes and how to convert their values when read from a JSON or TOML input,
+#   keyed as in STATE_HANDLERS
+CONFIG_STATE_FIELDS = {
+    "NAME": ("name", lambda value: str(value).upper()),
+    "COLOR": ("color", str),
+    "LABEL": ("label", str),
+    "LABEL-COLOR": ("labelColor", str),
+    "LINKS-TO": ("linksTo", _ReadConfigLinks),
+    "COLUMN": ("column", lambda value: int(value) - 1),
+    "ENERGY": ("energy", float),
+    "ENERGY-SHIFT": ("energy_shift", float),
+    "LABEL-OFFSET": ("labelOffset", _ReadConfigPair),
+    "TEXT-OFFSET": ("textOffset", _ReadConfigPair),
+    "LEGEND": ("legend", str),
+    "IMAGE": ("image", _LoadImage),
+    "IMAGE-OFFSET": ("imageOffset", _ReadConfigPair),
+    "IMAGE-SCALE": ("imageScale", lambda value: max(float(value), 0.1)),
+    "HIDE-ENERGY": ("show_energy", lambda value: not _ReadConfigBool(value)),
+}
+
+
+def ReadInputConfig(config, fig=None):
+    """
+    Build a Diagram from an already deserialised input, as read by ReadInputJSON or ReadInputTOML.
+
+    The global options are given in a "global" table and the states as a "states" list, both
+    using the same keys as the plain input format.
+    """
+    options = {
+        CanonicalGlobalKey(key.upper()): value
+        for key, value in config.get("global", {}).items()
+    }
+    for key in sorted(set(options) - GLOBAL_KEYS):
+        print("WARNING: Skipping unknown global option " + key)
+
+    outName = options.get("OUTPUT-FILE", "")
+    if outName:
+        outName = _OutputFileName(str(outName))
+    fontSize = options.get("FONT-SIZE")
+    if fontSize is not None:
+        fontSize = int(fontSize)
+    y_lims = options.get("ENERGY-RANGE")
+    if y_lims is not None:
+        y_lims = list(_ReadConfigPair(y_lims))
+    dpi = options.get("DPI")
+    if dpi is not None:
+        dpi = int(dpi)
+    tight_layout = _ReadConfigBool(options.get("TIGHT-LAYOUT", True))
+
+    statesList = []
+    for number, entry in enumerate(config.get("states", []), 1):
+        state = State()
+        for key, value in entry.items():
+            field = CONFIG_STATE_FIELDS.get(CanonicalStateKey(key.upper()))
+            if field is None:
+                print("Ignoring unrecognised key " + key + " of state " + str(number))
+                continue
+            try:
+                setattr(state, field[0], field[1](value))
+            except (ValueError, TypeError, IndexError, OSError):
+                print("ERROR: Could not read " + key + " of state " + str(number) + ":")
+                print("\t" + repr(value))
+                raise
+        statesList.append(state)
+
+    return _BuildDiagram(
+        statesList,
+        int(options.get("WIDTH", 0)),
+        int(options.get("HEIGHT", 0)),
+        fontSize,
+        outName,
+        y_lims,
+        dpi,
+        tight_layout,
+        str(options.get("ENERGY-UNITS", "")),
+        float(options.get("GLOBAL-SHIFT", 0.0)),
+        fig,
+    )
+
+
+def ReadInputJSON(filename, fig=None):
+    """
+    Read a diagram from a JSON input, see ReadInputConfig for the layout.
+    """
+    with open(filename, "r", encoding="utf-8") as inp:
+        config = json.load(inp)
+    return ReadInputConfig(config, fig)
+
+
+def ReadInputTOML(filename, fig=None):
+    """
+    Read a diagram from a TOML input, see ReadInputConfig for the layout. Needs python 3.11+.
+    """
+    if tomllib is None:
+        raise ImportError("Reading TOML input requires python 3.11 or later (tomllib).")
+    with open(filename, "rb") as inp:
+        config = tomllib.load(inp)
+    return ReadInputConfig(config, fig)
+
+
 ######################################################################################################
 #          Example printing function. Skip to bottom.
 ######################################################################################################
 
 
 def MakeExampleFile():
-    output = open("example.inp", "w")
+    output = open("example.inp", "w", encoding="utf-8")
 
     output.write(
         "output-file     = example.pdf"
@@ -639,19 +1199,24 @@ def main():
             print("\nAn example file will be made.")
             MakeExampleFile()
         raise IOError("No Input file provided.")
-    if len(sys.argv) > 2:
-        print(
-            "Incorrect arguments. Correct call:\npython EnergyLeveler.py <INPUT FILE>"
-        )
-        raise ValueError("Incorrect Arguments.")
 
-    diagram = ReadInput(sys.argv[1])
-    diagram.MakeLeftRightPoints()
-    diagram.Draw()
+    #   Several inputs can be given, they are drawn one after another on the same figure
+    fig = None
+    for filename in sys.argv[1:]:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".json":
+            diagram = ReadInputJSON(filename, fig)
+        elif extension == ".toml":
+            diagram = ReadInputTOML(filename, fig)
+        else:
+            diagram = ReadInput(filename, fig)
+        diagram.MakeLeftRightPoints()
+        diagram.Draw()
+        fig = diagram.fig
 
-    print("o=======================================================o")
-    print("         Image " + diagram.outputName + " made!")
-    print("o=======================================================o")
+        print("o=======================================================o")
+        print("         Image " + diagram.outputName + " made!")
+        print("o=======================================================o")
 
 
 if __name__ == "__main__":